@@ -43,6 +43,7 @@
 # ------------------------------------------------------------------------
 
 import logging
+import re
 import knime.extension as knext
 from google.oauth2.credentials import Credentials
 
@@ -54,14 +55,7 @@ from google.ads.googleads.client import GoogleAdsClient
 from google.ads.googleads.v16.services.services.google_ads_service.client import (
     GoogleAdsServiceClient,
 )
-import pandas as pd
 from google.ads.googleads.v16.services.types.google_ads_service import GoogleAdsRow
-from google.ads.googleads.v16.services.services.customer_service.client import (
-    CustomerServiceClient,
-)
-from google.ads.googleads.v16.services.types.customer_service import (
-    ListAccessibleCustomersResponse,
-)
 from util.common import (
     GoogleAdObjectSpec,
     GoogleAdConnectionObject,
@@ -71,6 +65,17 @@ from google.ads.googleads.errors import GoogleAdsException
 
 LOGGER = logging.getLogger(__name__)
 
+# Customer IDs are 10 digits once the dashes are removed
+CUSTOMER_ID_PATTERN = re.compile(r"\d{10}")
+
+# Query used to fetch the campaign IDs of the account when connecting
+CAMPAIGNS_QUERY = """
+SELECT
+    campaign.id,
+    campaign.name
+FROM campaign
+ORDER BY campaign.id"""
+
 
 @knext.node(
     name="Google Ads Connector (Labs)",
@@ -146,6 +151,9 @@ class GoogleAdsConnector:
     def execute(
         self, exec_context: knext.ExecutionContext, credential: knext.PortObject
     ):
+        # Validate both IDs before building the client, so malformed IDs fail without any API call
+        manager_customer_id = cleanup_ids(self.manager_customer_id)
+        account_id = cleanup_ids(self.account_id)
 
         # Combine credentials with customer ID
         # Use the access token provided in the input port.
@@ -162,21 +170,16 @@ class GoogleAdsConnector:
         client = GoogleAdsClient(
             credentials=credentials,
             developer_token=self.developer_token.strip(),
-            login_customer_id=cleanup_ids(self.manager_customer_id),
+            login_customer_id=manager_customer_id,
         )
 
-        # Leaving this Logger because it is useful for testing the authentication via service account.
-        mcc = manager_customer_ids(client)
-        LOGGER.warning(f" testing client built {mcc[0]}")
-
-        campaign_ids = get_campaigns_id(client, cleanup_ids(self.account_id))
+        # The campaign query is the single round trip of the connector, it also verifies the credentials.
+        campaign_ids = get_campaigns_id(client, account_id)
 
         test_connection(client)
 
         port_object = GoogleAdConnectionObject(
-            GoogleAdObjectSpec(
-                account_id=cleanup_ids(self.account_id), campaign_ids=campaign_ids
-            ),
+            GoogleAdObjectSpec(account_id=account_id, campaign_ids=campaign_ids),
             client=client,
         )
         return port_object
@@ -192,7 +195,9 @@ def cleanup_ids(id: str) -> str:
         raise knext.InvalidParametersError(
             "Please review your Manager Customer Id and your Account Id"
         )
-    return id.replace("-", "").strip()
+    cleaned_id = id.replace("-", "").strip()
+    test_customer_id(cleaned_id)
+    return cleaned_id
 
 
 def test_connection(client: GoogleAdsClient):
@@ -205,50 +210,32 @@ def test_connection(client: GoogleAdsClient):
 
 
 def test_customer_id(account_id: str):
-    # TODO Implement
-    pass
+    # Malformed IDs are rejected here instead of paying an API round trip to learn that they are invalid
+    if not CUSTOMER_ID_PATTERN.fullmatch(account_id):
+        raise knext.InvalidParametersError(
+            f"'{account_id}' is not a valid customer ID. Customer IDs have 10 digits, e.g. 123-456-7890."
+        )
 
 
 # This method is useful to get the connection because we are perfoming a query to get the campaign ids.
 # So we use the client object (build with the developer token the google auth credentials and the Manager Customer ID) and the account id to get the campaign ids.)
 # In case of failure we raise a meaningful error message.
 def get_campaigns_id(client: GoogleAdsClient, account_id: str) -> list[str]:
-    query = """
-    SELECT
-        campaign.id,
-        campaign.name
-    FROM campaign
-    ORDER BY campaign.id"""
-
     ga_service: GoogleAdsServiceClient
     ga_service = client.get_service("GoogleAdsService")
 
     search_request = client.get_type("SearchGoogleAdsStreamRequest")
     search_request.customer_id = account_id
-    search_request.query = query
+    search_request.query = CAMPAIGNS_QUERY
 
-    df = pd.DataFrame()
+    campaign_ids = []
     try:
         response_stream = ga_service.search_stream(search_request)
-        data = []
-        header_array = []
+        # Only the campaign IDs are used, so they are collected directly from the rows
         for batch in response_stream:
-            header_array = [field for field in batch.field_mask.paths]
             for row in batch.results:
-                data_row = []
                 row: GoogleAdsRow
-                for field in batch.field_mask.paths:
-                    # Split the attribute_name string into parts
-                    attribute_parts = field.split(".")
-                    # Initialize the object to start the traversal
-                    attribute_value = row
-                    # Traverse the attribute parts and access the attributes
-                    for part in attribute_parts:
-                        attribute_value = getattr(attribute_value, part)
-                    data_row.append(attribute_value)
-                data.append(data_row)
-
-        df = pd.DataFrame(data, columns=header_array)
+                campaign_ids.append(row.campaign.id)
 
     except GoogleAdsException as ex:
         status_error = ex.error.code().name
@@ -265,24 +252,4 @@ def get_campaigns_id(client: GoogleAdsClient, account_id: str) -> list[str]:
         error_to_raise = ". ".join([error_first_part, error_second_part])
         raise knext.InvalidParametersError(error_to_raise)
 
-    df_list = pd.DataFrame(df)["campaign.id"].tolist()
-    return df_list
-
-
-# this function is to test the authentication via service account, delete after implementation.
-# using it because we don't need to use the account id to perfomr the query. Only the dev tokent and the test manager account id.
-def manager_customer_ids(client):
-    # Accessing access token from input credential port via DialogCreationContext
-    customer_service: CustomerServiceClient
-    customer_service = client.get_service("CustomerService")
-
-    # Accessing customer IDs
-    accessible_customers: ListAccessibleCustomersResponse
-    accessible_customers = customer_service.list_accessible_customers()
-
-    resource_names = accessible_customers.resource_names
-
-    # Extract numerical IDs from resource names
-    customer_ids = [str(name.split("/")[-1]) for name in resource_names]
-
-    return customer_ids
+    return campaign_ids
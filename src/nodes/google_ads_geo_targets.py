@@ -48,16 +48,16 @@
 
 #####################
 import logging
+import time
 import knime.extension as knext
 import google_ads_ext
-import pandas as pd
+import pyarrow as pa
 from google.ads.googleads.client import GoogleAdsClient
 from util.common import (
     GoogleAdObjectSpec,
     GoogleAdConnectionObject,
     google_ad_port_type,
 )
-import util.pre_built_ad_queries as pb_queries
 from google.ads.googleads.v16.services.services.google_ads_service.client import (
     GoogleAdsServiceClient,
 )
@@ -71,6 +71,27 @@ import util.geo_target_queries as geo_queries
 
 LOGGER = logging.getLogger(__name__)
 
+# Output columns of the node, in the order of the fields selected by the geo target queries
+OUTPUT_SCHEMA = pa.schema(
+    [
+        ("Country Code", pa.string()),
+        ("Name", pa.string()),
+        ("Canonical Name", pa.string()),
+        ("ID", pa.int64()),
+        ("Resource Name", pa.string()),
+        ("Target Type", pa.string()),
+        ("Parent ID", pa.string()),
+    ]
+)
+
+# Geo target constants are reference data that is the same for all accounts and changes rarely.
+# The results are cached per query so that re-executing the node does not fetch them again.
+# Empty results are cached as well, since an unsupported country and target type combination stays unsupported.
+GEO_TARGETS_CACHE_TTL_SECONDS = 3600
+_geo_targets_cache = {}
+
+NO_GEO_TARGETS_WARNING = "No data was returned from the query. The target type is not supported for the selected country. Please try another combination."
+
 
 @knext.node(
     name="Google Ads Geo Targets (Labs)",
@@ -121,6 +142,7 @@ class GoogleAdsGeoTargets:
 
     **Output**
 
+    - The fetched locations are reused for one hour when the node is executed again with the same country and target type.
     - Outputs the geo target locations for further processing or analysis in KNIME Analytics Platform. You can combine this output with other KNIME extension, such as the [Geospatial Analytics Extension](https://hub.knime.com/center%20for%20geographic%20analysis%20at%20harvard%20university/extensions/sdl.harvard.features.geospatial/latest/).
     """
 
@@ -185,6 +207,15 @@ class GoogleAdsGeoTargets:
             self.country_selection, self.target_type
         )
 
+        cached = _geo_targets_cache.get(primary_query)
+        if (
+            cached is not None
+            and time.monotonic() - cached[0] < GEO_TARGETS_CACHE_TTL_SECONDS
+        ):
+            if cached[1].num_rows == 0:
+                exec_context.set_warning(NO_GEO_TARGETS_WARNING)
+            return knext.Table.from_pyarrow(cached[1])
+
         ga_service: GoogleAdsServiceClient
         ga_service = client.get_service("GoogleAdsService")
 
@@ -192,7 +223,7 @@ class GoogleAdsGeoTargets:
         search_request.customer_id = account_id
         search_request.query = primary_query
 
-        df = pd.DataFrame()
+        table = OUTPUT_SCHEMA.empty_table()
         ##################
         # [START PRIMARY QUERY]
         ##################
@@ -201,9 +232,8 @@ class GoogleAdsGeoTargets:
                 search_request, timeout=self.custom_timeout
             )
 
-            # Initialize the necessary variables
-            data = []
-            header_array = []
+            # Initialize the necessary variables, one list of values per output column
+            columns = [[] for _ in OUTPUT_SCHEMA.names]
             all_batches = []
 
             # First pass: Collect all batches and count them
@@ -218,34 +248,20 @@ class GoogleAdsGeoTargets:
 
                 # Process each batch
                 for i, batch in enumerate(all_batches, start=0):
+                    # Check for cancellation once per batch
                     utils.check_canceled(exec_context)
 
-                    header_array = [field for field in batch.field_mask.paths]
+                    # Attribute names of each field, shared by all rows of the batch
+                    attribute_paths = utils.get_attribute_paths(batch.field_mask.paths)
 
                     for row in batch.results:
-                        # cancel the execution if the user cancels the execution
-                        utils.check_canceled(exec_context)
-                        data_row = []
                         row: GoogleAdsRow
-                        for field in batch.field_mask.paths:
-                            utils.check_canceled(exec_context)
-                            # Split the attribute_name string into parts
-                            attribute_parts = field.split(".")
-
+                        for column, attribute_parts in zip(columns, attribute_paths):
                             # Initialize the object to start the traversal
                             attribute_value = row
 
                             # Traverse the attribute parts and access the attributes
                             for part in attribute_parts:
-                                utils.check_canceled(exec_context)
-                                # query-fix for ADGROUP and AD queries: we are iterating over the attribute_value (type = class) line
-                                # and using the field name splitted to access the values with the getattr(method),
-                                # when trying to use 'type' there is not any attr called like this
-                                # in the class attribute_value, so adding and underscore fix this.
-                                # temp fix: we don't know how to check before the attr name of the class attribute value
-                                if part == "type":
-                                    part = part + "_"
-
                                 attribute_value = getattr(attribute_value, part)
 
                                 # query-fix for AD query. Explanation for the below if: when fetching the field "final_urls" from the response_stream, it returned a [] type that was not in any Python readable type.
@@ -260,44 +276,22 @@ class GoogleAdsGeoTargets:
                                         attribute_value = ""
                                     else:
                                         attribute_value = attribute_value.pop(0)
-                            data_row.append(attribute_value)
-                        data.append(data_row)
+                            column.append(attribute_value)
 
                     # Set up the progress bar
                     exec_context.set_progress(
                         i / number_of_batches,
-                        str(i * 10000)
-                        + " rows processed. We are preparing your data \U0001F468\u200D\U0001F373",
+                        utils.ROWS_PROCESSED_PROGRESS_MESSAGE.format(i * 10000),
                     )
-                # Create a DataFrame from the collected data
-                df = pd.DataFrame(data, columns=header_array)
-                df.columns = [
-                    "Country Code",
-                    "Name",
-                    "Canonical Name",
-                    "ID",
-                    "Resource Name",
-                    "Target Type",
-                    "Parent ID",
-                ]
-            else:
-                column_types = {
-                    "Country Code": "string",
-                    "Name": "string",
-                    "Canonical Name": "string",
-                    "ID": "int64",
-                    "Resource Name": "string",
-                    "Target Type": "string",
-                    "Parent ID": "string",
-                }
-
-                # Create an empty DataFrame with the specified column names and types to avoid data spec warnings
-                df = pd.DataFrame(
-                    {col: pd.Series(dtype=typ) for col, typ in column_types.items()}
-                )
-                exec_context.set_warning(
-                    "No data was returned from the query. The target type is not supported for the selected country. Please try another combination."
+                # Create an Arrow table from the collected columns
+                table = pa.table(
+                    dict(zip(OUTPUT_SCHEMA.names, columns)), schema=OUTPUT_SCHEMA
                 )
+            else:
+                # The empty table keeps the column names and types to avoid data spec warnings
+                exec_context.set_warning(NO_GEO_TARGETS_WARNING)
+
+            _geo_targets_cache[primary_query] = (time.monotonic(), table)
 
         except GoogleAdsException as ex:
             status_error = ex.error.code().name
@@ -317,4 +311,4 @@ class GoogleAdsGeoTargets:
         # [END PRIMARY QUERY]
         ##################
 
-        return knext.Table.from_pandas(pd.DataFrame(df))
+        return knext.Table.from_pyarrow(table)
@@ -58,25 +58,14 @@ from google.ads.googleads.v16.services.services.google_ads_service.client import
 from google.ads.googleads.v16.services.services.keyword_plan_idea_service.client import (
     KeywordPlanIdeaServiceClient,
 )
-from google.ads.googleads.v16.services.services.geo_target_constant_service.client import (
-    GeoTargetConstantServiceClient,
-)
-from google.ads.googleads.v16.services.types.keyword_plan_idea_service import (
-    GenerateKeywordIdeasRequest,
-)
-from google.ads.googleads.v16.enums.types.keyword_plan_competition_level import (
-    KeywordPlanCompetitionLevelEnum,
-)
 from google.ads.googleads.v16.enums.types.keyword_plan_network import (
     KeywordPlanNetworkEnum,
 )
 from datetime import date, datetime
 from dateutil.relativedelta import relativedelta
-from google.ads.googleads.errors import GoogleAdsException
 
 import util.keyword_ideas_utils as keyword_ideas_utils
 from util.utils import check_column, pick_default_column, create_type_filer
-import numpy as np
 
 
 LOGGER = logging.getLogger(__name__)
@@ -184,7 +173,7 @@ class GoogleAdsKwdIdeas(knext.PythonNode):
         since_version=None,
         column_filter=create_type_filer(knext.int64()),
     )
-    # Select language parameter group hardcoded from the CSV in the data folder and built as class (EnumParameterOptions) in the data_utils.py file.
+    # Select language parameter group hardcoded from the CSV in the data folder and built as class (EnumParameterOptions) in the keyword_ideas_utils.py file.
 
     language_selection = knext.EnumParameter(
         label="Language",
@@ -326,17 +315,38 @@ class GoogleAdsKwdIdeas(knext.PythonNode):
         language_id = keyword_ideas_utils.get_criterion_id(self.language_selection)
 
         # Get the location IDs from the location table
-        location_ids_column = location_table.to_pandas()
-        location_ids_list = location_ids_column[self.locations_column].tolist()
+        # Only the selected column is converted, the other columns of the input table are not needed
+        location_ids_column = location_table[self.locations_column].to_pandas()
+        location_ids = location_ids_column[self.locations_column]
+        # Drop missing location IDs in one vectorized pass, they can't be mapped to resource names
+        location_ids_list = location_ids[location_ids.notna()].astype("int64").tolist()
+        number_of_missing_location_ids = len(location_ids) - len(location_ids_list)
+        # Repeated location IDs would target the same location twice, keep the first occurrence only
+        location_ids_list = list(dict.fromkeys(location_ids_list))
 
         # Get the keywords from the input table
         keywords_column = self.keywords_column
         if self.keywords_column is not None:
-            keyword_texts_df = input_table.to_pandas()
+            keyword_texts_df = input_table[keywords_column].to_pandas()
         else:
             exec_context.set_warning("No column selected")
 
-        keyword_texts = keyword_texts_df[keywords_column].tolist()
+        # Strip surrounding whitespace from all seeds in one vectorized pass
+        keyword_texts = keyword_texts_df[keywords_column].str.strip()
+
+        # Missing and empty seeds would only make the API reject the request, so they are
+        # masked out before any request is sent
+        valid_seeds = keyword_texts.notna() & (keyword_texts != "")
+        number_of_invalid_rows = int((~valid_seeds).sum()) + (
+            number_of_missing_location_ids
+        )
+        if number_of_invalid_rows > 0:
+            exec_context.set_warning(
+                f"{number_of_invalid_rows} rows with missing or empty seeds or location IDs were skipped."
+            )
+        # Repeated seeds (e.g. after upstream joins) would send the same request twice,
+        # so they are collapsed to their first occurrence
+        keyword_texts = keyword_texts[valid_seeds].drop_duplicates().tolist()
 
         # Creating the Google Ads Client object
         client: GoogleAdsClient
@@ -346,14 +356,6 @@ class GoogleAdsKwdIdeas(knext.PythonNode):
         keyword_plan_idea_service: KeywordPlanIdeaServiceClient
         keyword_plan_idea_service = client.get_service("KeywordPlanIdeaService")
 
-        # This is a system for measuring a keyword's level of competition in ad placement.
-        # It's based on the number of advertisers bidding on that keyword compared to all other keywords on Google.
-        # The level can vary depending on location and Search Network targeting options.
-        # UNSPECIFIED = 0;UNKNOWN = 1;LOW = 2;MEDIUM = 3;HIGH = 4
-
-        keyword_competition_level_enum: KeywordPlanCompetitionLevelEnum
-        keyword_competition_level_enum = client.enums.KeywordPlanCompetitionLevelEnum
-
         # Container for enumeration of keyword plan forecastable network types
         keyword_plan_network: KeywordPlanNetworkEnum
         keyword_plan_network = (
@@ -362,13 +364,12 @@ class GoogleAdsKwdIdeas(knext.PythonNode):
 
         # List the location IDs
         location_rns = keyword_ideas_utils.map_locations_ids_to_resource_names(
-            client, location_ids_list
+            location_ids_list
         )
 
-        # Returns a fully-qualified language_constant string.
-        language_rn_get_service: GoogleAdsServiceClient
-        language_rn_get_service = client.get_service("GoogleAdsService")
-        language_rn = language_rn_get_service.language_constant_path(language_id)
+        # Returns a fully-qualified language_constant string. The path helper is a static method,
+        # so there is no need to create a GoogleAdsService client (and its gRPC channel) for it.
+        language_rn = GoogleAdsServiceClient.language_constant_path(language_id)
 
         # Do the Keyword Ideas generation and return the table
 
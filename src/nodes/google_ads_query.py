@@ -66,6 +66,16 @@ import util.utils as utils
 
 LOGGER = logging.getLogger(__name__)
 
+# Query used when no custom or pre-built query is provided
+DEFAULT_QUERY = """
+SELECT
+    campaign.id,
+    campaign.name,
+    metrics.impressions,
+    metrics.clicks,
+    metrics.cost_micros
+FROM campaign"""
+
 
 class QueryBuilderMode(knext.EnumParameterOptions):
     PREBUILT = (
@@ -226,15 +236,6 @@ class GoogleAdsQuery:
         # TODO Implement config window with a query builder
         execution_query = self.define_query()
 
-        DEFAULT_QUERY = """
-        SELECT
-            campaign.id,
-            campaign.name,
-            metrics.impressions,
-            metrics.clicks,
-            metrics.cost_micros
-        FROM campaign"""
-
         if execution_query == "":
             exec_context.set_warning(
                 "Used default query because you didn't provide one."
@@ -272,35 +273,23 @@ class GoogleAdsQuery:
 
                 # Process each batch
                 for i, batch in enumerate(all_batches, start=0):
+                    # Check for cancellation once per batch
                     utils.check_canceled(exec_context)
 
                     header_array = [field for field in batch.field_mask.paths]
 
+                    # Attribute names of each field, shared by all rows of the batch
+                    attribute_paths = utils.get_attribute_paths(batch.field_mask.paths)
+
                     for row in batch.results:
-                        # Cancel the execution if the user cancels the node execution
-                        utils.check_canceled(exec_context)
                         data_row = []
                         row: GoogleAdsRow
-                        for field in batch.field_mask.paths:
-                            utils.check_canceled(exec_context)
-
-                            # Split the attribute_name string into parts
-                            attribute_parts = field.split(".")
-
+                        for attribute_parts in attribute_paths:
                             # Initialize the object to start the traversal
                             attribute_value = row
 
                             # Traverse the attribute parts and access the attributes
                             for part in attribute_parts:
-
-                                # query-fix for ADGROUP and AD queries: we are iterating over the attribute_value (type = class) line
-                                # and using the field name splitted to access the values with the getattr(method),
-                                # when trying to use 'type' there is not any attr called like this
-                                # in the class attribute_value, so adding and underscore fix this.
-                                # temp fix: we don't know how to check before the attr name of the class attribute value
-                                if part == "type":
-                                    part = part + "_"
-
                                 attribute_value = getattr(attribute_value, part)
 
                                 # query-fix for AD query. Explanation for the below if: when fetching the field "final_urls" from the response_stream, it returned a [] type that was not in any Python readable type.
@@ -321,15 +310,17 @@ class GoogleAdsQuery:
                     # Set up the progress bar taking the toal number of batches and the batch iteration counter (1 batch = 10.000 rows)
                     exec_context.set_progress(
                         i / number_of_batches,
-                        str(i * 10000)
-                        + " rows processed. We are preparing your data \U0001F468\u200D\U0001F373",
+                        utils.ROWS_PROCESSED_PROGRESS_MESSAGE.format(i * 10000),
                     )
-                # Create a pandas dataframe with the data and the header
-                df = pd.DataFrame(data, columns=header_array)
-                df.columns = [
-                    col.replace(".", " ").replace("_", " ").title()
-                    for col in df.columns
-                ]
+                # Create a pandas dataframe with the data and the header.
+                # Beatufy column names. Title case and replace _ with space
+                df = pd.DataFrame(
+                    data,
+                    columns=[
+                        col.replace(".", " ").replace("_", " ").title()
+                        for col in header_array
+                    ],
+                )
 
         except GoogleAdsException as ex:
             status_error = ex.error.code().name
@@ -348,9 +339,8 @@ class GoogleAdsQuery:
         ##################
         # [END QUERY]
         ##################
-        # Beatufy column names. Title case and replace _ with space
 
-        return knext.Table.from_pandas(pd.DataFrame(df))
+        return knext.Table.from_pandas(df)
 
     def define_query(self):
         query = ""
@@ -1,6 +1,10 @@
+import functools
 import knime.extension as knext
 
-country_target_type_query = """SELECT 
+# The queries are kept readable here and collapsed to a single line once at import,
+# so only the compact form is formatted and sent to the API
+country_target_type_query = " ".join(
+    """SELECT 
   geo_target_constant.country_code, 
   geo_target_constant.name, 
   geo_target_constant.canonical_name,
@@ -10,11 +14,13 @@ country_target_type_query = """SELECT
   geo_target_constant.parent_geo_target
 FROM geo_target_constant 
 WHERE 
-  geo_target_constant.target_type = '$$target_type$$'
-  AND geo_target_constant.country_code = '$$country_code$$' 
-  AND geo_target_constant.status = 'ENABLED'"""
+  geo_target_constant.target_type = '{target_type}'
+  AND geo_target_constant.country_code = '{country_code}' 
+  AND geo_target_constant.status = 'ENABLED'""".split()
+)
 
-country_target_all_type_query = """SELECT 
+country_target_all_type_query = " ".join(
+    """SELECT 
   geo_target_constant.country_code, 
   geo_target_constant.name, 
   geo_target_constant.canonical_name,
@@ -24,21 +30,31 @@ country_target_all_type_query = """SELECT
   geo_target_constant.parent_geo_target
 FROM geo_target_constant 
 WHERE 
-  geo_target_constant.country_code = '$$country_code$$' 
-  AND geo_target_constant.status = 'ENABLED' """
+  geo_target_constant.country_code = '{country_code}' 
+  AND geo_target_constant.status = 'ENABLED' """.split()
+)
 
 
+# The inputs are limited to the node options, so the number of cached queries is bounded
+@functools.lru_cache(maxsize=None)
 def get_country_type_query(country_code, target_type):
+    # Only options of the node are substituted into the query, anything else is rejected before building it
+    if country_code not in VALID_COUNTRY_CODES or target_type not in TARGET_TYPE_LABELS:
+        raise knext.InvalidParametersError(
+            f"Unsupported country '{country_code}' or target type '{target_type}'."
+        )
+
     if target_type != "ALL":
         # If target_type is provided, use country_target_type_query
-        return country_target_type_query.replace(
-            "$$country_code$$",
-            country_code,
-            # Convert target_type to title case because the query expects exact match and it is case sensitive
-        ).replace("$$target_type$$", target_type.title())
+        return country_target_type_query.format(
+            country_code=country_code,
+            # Use the label of the target type because the query expects exact match and it is case sensitive.
+            # Title-casing the option name would give e.g. 'Tv_Region' instead of 'TV Region'.
+            target_type=TARGET_TYPE_LABELS[target_type],
+        )
     else:
         # If target_type is not provided, use country_all_target_query
-        return country_target_all_type_query.replace("$$country_code$$", country_code)
+        return country_target_all_type_query.format(country_code=country_code)
 
 
 class TargetTypeOptions(knext.EnumParameterOptions):
@@ -349,3 +365,8 @@ class CountryOptions(knext.EnumParameterOptions):
     YE = ("Yemen", "Output the locations available in Yemen")
     ZM = ("Zambia", "Output the locations available in Zambia")
     ZW = ("Zimbabwe", "Output the locations available in Zimbabwe")
+
+
+# Valid country codes and the labels of the target types, built once for constant time validation
+VALID_COUNTRY_CODES = frozenset(CountryOptions.__members__)
+TARGET_TYPE_LABELS = {option.name: option.value[0] for option in TargetTypeOptions}
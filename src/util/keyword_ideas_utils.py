@@ -1,22 +1,18 @@
 import logging
-import csv
-import os
 import knime.extension as knext
 import pandas as pd
 from collections import deque
 import time
 import random
-from itertools import (
-    islice,
-    tee,
-)
+import threading
+from itertools import islice
 import numpy as np
 from datetime import timedelta
 from google.ads.googleads.v16.errors.types.quota_error import QuotaErrorEnum
 from google.ads.googleads.errors import GoogleAdsException
 from google.api_core.exceptions import ResourceExhausted
-from google.ads.googleads.v16.services.types.keyword_plan_idea_service import (
-    GenerateKeywordIdeasRequest,
+from google.ads.googleads.v16.services.services.geo_target_constant_service.client import (
+    GeoTargetConstantServiceClient,
 )
 from util.utils import check_canceled
 import math
@@ -30,41 +26,74 @@ LOGGER = logging.getLogger(__name__)
 ###########################################################
 
 
-# Read the CSV from the data folder. For now we Harcoded the language codes since they are not changing frequently
-def read_csv():
-    # Get the directory of the current script
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-
-    # Path to the CSV file relative to the current script
-    csv_file_path = os.path.join(script_dir, "../../data/language_codes.csv")
-
-    language_name_to_criterion_id = {}
-
-    with open(csv_file_path, mode="r") as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            language_name = row["Language name"]
-            criterion_id = row["Criterion ID"]
-
-            language_name_to_criterion_id[language_name] = criterion_id
-
-    return language_name_to_criterion_id
-
-
-# Reading the CSV file and creating dictionaries and list
-language_name_to_criterion_id = read_csv()
-
-
-# Function to get the criterion ID based on the language name
-def get_criterion_id(language_name):
-    language_name = language_name.title()
-    return language_name_to_criterion_id.get(language_name, "Language name not found")
+# Language names and criterion IDs as listed in data/language_codes.csv. They are not changing frequently,
+# so they are kept as a literal instead of reading and parsing the CSV file on every import.
+language_name_to_criterion_id = {
+    "Arabic": "1019",
+    "Bengali": "1056",
+    "Bulgarian": "1020",
+    "Catalan": "1038",
+    "Chinese (simplified)": "1017",
+    "Chinese (traditional)": "1018",
+    "Croatian": "1039",
+    "Czech": "1021",
+    "Danish": "1009",
+    "Dutch": "1010",
+    "English": "1000",
+    "Estonian": "1043",
+    "Filipino": "1042",
+    "Finnish": "1011",
+    "French": "1002",
+    "German": "1001",
+    "Greek": "1022",
+    "Gujarati": "1072",
+    "Hebrew": "1027",
+    "Hindi": "1023",
+    "Hungarian": "1024",
+    "Icelandic": "1026",
+    "Indonesian": "1025",
+    "Italian": "1004",
+    "Japanese": "1005",
+    "Kannada": "1086",
+    "Korean": "1012",
+    "Latvian": "1028",
+    "Lithuanian": "1029",
+    "Malay": "1102",
+    "Malayalam": "1098",
+    "Marathi": "1101",
+    "Norwegian": "1013",
+    "Persian": "1064",
+    "Polish": "1030",
+    "Portuguese": "1014",
+    "Punjabi": "1110",
+    "Romanian": "1032",
+    "Russian": "1031",
+    "Serbian": "1035",
+    "Slovak": "1033",
+    "Slovenian": "1034",
+    "Spanish": "1003",
+    "Swedish": "1015",
+    "Tamil": "1130",
+    "Telugu": "1131",
+    "Thai": "1044",
+    "Turkish": "1037",
+    "Ukrainian": "1036",
+    "Urdu": "1041",
+    "Vietnamese": "1040",
+}
+
+
+# Function to get the criterion ID based on the selected LanguageSelection option name, e.g. CHINESE_SIMPLIFIED
+def get_criterion_id(language_selection):
+    return language_selection_to_criterion_id.get(
+        language_selection, "Language name not found"
+    )
 
 
 # Enum options for the language selection
 class LanguageSelection(knext.EnumParameterOptions):
     """
-    Subclass of knext.EnumParameterOptions to handle language options from a CSV file.
+    Subclass of knext.EnumParameterOptions to handle the language options listed in data/language_codes.csv.
     """
 
     ARABIC = ("Arabic", "The Arabic language (1019)")
@@ -126,6 +155,14 @@ class LanguageSelection(knext.EnumParameterOptions):
     VIETNAMESE = ("Vietnamese", "The Vietnamese language (1040)")
 
 
+# The parameter stores the option name, which is mapped to the criterion ID of its label once at import.
+# Looking up the label directly also covers names such as CHINESE_SIMPLIFIED, which don't title-case to their label.
+language_selection_to_criterion_id = {
+    option.name: language_name_to_criterion_id[option.value[0]]
+    for option in LanguageSelection
+}
+
+
 class NewKeywordIdeasMode(knext.EnumParameterOptions):
     KEYWORDS = (
         "Keywords",
@@ -139,14 +176,57 @@ class NewKeywordIdeasMode(knext.EnumParameterOptions):
 
 ###### START of methods to handle the execution in chunks to avoid resource exhaustion ######
 
-# Initialize a deque to keep track of request timestamps
-request_timestamps = deque(maxlen=60)
+# Progress message shown while the keyword ideas are requested
+KEYWORD_IDEAS_PROGRESS_MESSAGE = "We have generated  {} keyword ideas so far. More ideas \U0001F4A1 are on the way!. This process may take some time, so please be pacient."
+
+# Max requests per min are 60: 1 request per second. Requests are spaced more conservatively to reduce API rate limit issues.
+MAX_REQUESTS_PER_MINUTE = 60
+MIN_SECONDS_BETWEEN_REQUESTS = 3
+
+# Initialize a deque to keep track of request timestamps. It is shared by all executions in the process,
+# the lock makes sure that concurrent executions respect the same limits.
+request_timestamps = deque(maxlen=MAX_REQUESTS_PER_MINUTE)
+request_timestamps_lock = threading.Lock()
+
+
+def wait_for_rate_limit():
+    """
+    Blocks until a new request can be sent without exceeding the request rate, and records its timestamp.
+    """
+    with request_timestamps_lock:
+        now = time.time()
+        sleep_time = 0
+        if request_timestamps:
+            sleep_time = request_timestamps[-1] + MIN_SECONDS_BETWEEN_REQUESTS - now
+        if len(request_timestamps) == MAX_REQUESTS_PER_MINUTE:
+            sleep_time = max(sleep_time, request_timestamps[0] + 60 - now)
+        if sleep_time > 0:
+            LOGGER.warning(
+                "Sleeping for %s seconds due to rate limiting",
+                format_timestamp(sleep_time),
+            )
+            time.sleep(sleep_time)
+        request_timestamps.append(time.time())
+
 
 # Define a function to retry the request with exponential backoff if a RESOURCE_EXHAUSTED error occurs.
-# Max requests per min are 60: 1 request per second
 # Quota reference website: https://developers.google.com/google-ads/api/docs/best-practices/quotas#planning_services
 
 
+# Quota errors that are returned inside a GoogleAdsException but go away when the request is sent again later
+RETRYABLE_QUOTA_ERRORS = (
+    QuotaErrorEnum.QuotaError.RESOURCE_EXHAUSTED,
+    QuotaErrorEnum.QuotaError.RESOURCE_TEMPORARILY_EXHAUSTED,
+)
+
+
+def is_retryable_quota_error(ex: GoogleAdsException) -> bool:
+    return any(
+        error.error_code.quota_error in RETRYABLE_QUOTA_ERRORS
+        for error in ex.failure.errors
+    )
+
+
 def exponential_backoff_retry(
     func, max_attempts=5, initial_delay=2, max_delay=60, chunk_info=None
 ):
@@ -155,59 +235,53 @@ def exponential_backoff_retry(
     for attempt in range(max_attempts):
         try:
             # Rate limiting check
-            if request_timestamps:
-                time_since_last_request = time.time() - request_timestamps[-1]
-                formatted_time = format_timestamp(time_since_last_request)
-                LOGGER.warning(f"Time since last request: {formatted_time}")
-                if time_since_last_request < 1:
-                    sleep_time = 1 - time_since_last_request
-                    formatted_sleep_time = format_timestamp(sleep_time)
-                    LOGGER.warning(
-                        f"Sleeping for {formatted_sleep_time} seconds due to rate limiting"
-                    )
-                    time.sleep(sleep_time)
-
-            # Make the request and record the timestamp
+            wait_for_rate_limit()
+
+            # Make the request
             result = func()
-            request_timestamps.append(time.time())
-            formatted_request_timestamps = [
-                format_timestamp(ts) for ts in request_timestamps
-            ]
-            LOGGER.warning(f"Request timestamps: {formatted_request_timestamps}")
-            LOGGER.warning(f"Length of request timestamps: {len(request_timestamps)}")
             return result
 
         # Catch the RESOURCE_EXHAUSTED error and retry the request
         except ResourceExhausted as ex:
             LOGGER.warning(
-                f"ResourceExhausted exception caught for chunk {chunk_info}: {ex}"
+                "ResourceExhausted exception caught for chunk %s: %s", chunk_info, ex
             )
-            LOGGER.warning(f"ResourceExhausted exception caught: {ex}")
+            LOGGER.warning("ResourceExhausted exception caught: %s", ex)
             if attempt < max_attempts - 1:
                 LOGGER.warning(
-                    f"Attempt {attempt+1} failed due to RESOURCE_EXHAUSTED. Retrying in {delay} seconds..."
+                    "Attempt %s failed due to RESOURCE_EXHAUSTED. Retrying in %s seconds...",
+                    attempt + 1,
+                    delay,
                 )
-                time.sleep(delay)
+                # Add jitter to avoid thundering herd problem, without exceeding the maximum delay
+                time.sleep(min(delay + random.uniform(0, delay), max_delay))
                 delay = min(delay * 2, max_delay)
-                delay += random.uniform(
-                    0, delay
-                )  # Add jitter to avoid thundering herd problem
             else:
                 max_attempts_error_msg = "Max attempts reached, raising the exception."
                 raise knext.InvalidParametersError(max_attempts_error_msg)
-        # Catch generics google ads exceptions
+        # Quota errors can also arrive wrapped in a GoogleAdsException, they are retried the same way
         except GoogleAdsException as ex:
-            LOGGER.error(f"GoogleAdsException caught: {ex}")
+            if is_retryable_quota_error(ex) and attempt < max_attempts - 1:
+                LOGGER.warning(
+                    "Attempt %s for chunk %s failed due to a quota error. Retrying in %s seconds...",
+                    attempt + 1,
+                    chunk_info,
+                    delay,
+                )
+                time.sleep(min(delay + random.uniform(0, delay), max_delay))
+                delay = min(delay * 2, max_delay)
+                continue
+            LOGGER.error("GoogleAdsException caught: %s", ex)
             for error in ex.failure.errors:
-                LOGGER.error(f"Error code: {error.error_code}")
-                LOGGER.error(f"Error message: {error.message}")
+                LOGGER.error("Error code: %s", error.error_code)
+                LOGGER.error("Error message: %s", error.message)
             status_error = ex.error.code().name
             error_messages = " ".join([error.message for error in ex.failure.errors])
             error_to_raise = f"Failed with status {status_error}. {error_messages}"
             raise knext.InvalidParametersError(error_to_raise)
         # Log any other exceptions and raise them
         except Exception as e:
-            LOGGER.error(f"An unexpected error occurred: {e}", exc_info=True)
+            LOGGER.error("An unexpected error occurred: %s", e, exc_info=True)
             raise
 
 
@@ -217,22 +291,57 @@ def chunked(iterable, size):
     return iter(lambda: tuple(islice(it, size)), ())
 
 
-# Function to parse monthly search volumes and convert to DataFrame
+# Functions to set the seed of a keyword ideas request for each input mode
+def set_url_seed(request, url):
+    request.url_seed.url = url
+
+
+def set_keyword_seed(request, keywords):
+    request.keyword_seed.keywords.extend(keywords)
+
+
+SEED_SETTERS = {
+    NewKeywordIdeasMode.URL.name: set_url_seed,
+    NewKeywordIdeasMode.KEYWORDS.name: set_keyword_seed,
+}
+
+# Maximum number of keywords sent as seed in a single request
+KEYWORDS_PER_REQUEST = 20
+
+
+# Split the seeds into (info, seed) pairs: one URL per request or chunks of keywords per request
+def build_seed_batches(keyword_ideas_mode, keyword_texts):
+    if keyword_ideas_mode == NewKeywordIdeasMode.URL.name:
+        return [(url, url) for url in keyword_texts]
+    return [
+        (i, keyword_texts[i : i + KEYWORDS_PER_REQUEST])
+        for i in range(0, len(keyword_texts), KEYWORDS_PER_REQUEST)
+    ]
+
+
+# Columns of the monthly search volumes output table
+MONTHLY_SEARCH_VOLUMES_COLUMNS = [
+    "Keyword Idea",
+    "Month",
+    "Year",
+    "Monthly Searches",
+    "Chunk Number",
+    "Locations in Chunk",
+]
+
+
+# Function to parse the monthly search volumes of a keyword idea and append them to the columns of the monthly table
 def parse_monthly_search_volumes(
-    monthly_search_volumes, keyword, iteration_id, location_ids
+    monthly_search_volumes, keyword, iteration_id, location_ids, columns
 ):
-    rows = [
-        {
-            "Keyword Idea": keyword,
-            "Month": metrics.month,
-            "Year": metrics.year,
-            "Monthly Searches": metrics.monthly_searches,
-            "Chunk Number": iteration_id,
-            "Locations in Chunk": location_ids,
-        }
-        for metrics in monthly_search_volumes
-    ]
-    return pd.DataFrame(rows)
+    number_of_months = len(monthly_search_volumes)
+    columns["Keyword Idea"].extend([keyword] * number_of_months)
+    for metrics in monthly_search_volumes:
+        columns["Month"].append(metrics.month)
+        columns["Year"].append(metrics.year)
+        columns["Monthly Searches"].append(metrics.monthly_searches)
+    columns["Chunk Number"].extend([iteration_id] * number_of_months)
+    columns["Locations in Chunk"].extend([location_ids] * number_of_months)
 
 
 # Function to generate keyword ideas with chunks
@@ -262,153 +371,80 @@ def generate_keywords_ideas_with_chunks(
     # Create empty lists to store list of location IDs used on each iteration
     location_ids = []
 
-    # Clear the request timestamps for a new batch of requests
-    request_timestamps.clear()
-
     # Process data in smaller batches to avoid memory issues
     batch_size = 80000  # Adjust this size as needed
 
     aggregated_data = []
     aggregated_monthly_volumes = []
 
+    # All the fields except the locations and the seed are the same for every request,
+    # so they are set once on a base request that is copied for each request
+    base_request = client.get_type("GenerateKeywordIdeasRequest")
+    base_request.customer_id = account_id
+    base_request.language = language_rn
+    base_request.keyword_plan_network = keyword_plan_network
+    base_request.include_adult_keywords = include_adult_keywords
+    historical_metrics_options = base_request.historical_metrics_options
+    year_month_range = historical_metrics_options.year_month_range
+    year_month_range.start.year = date_start.year
+    year_month_range.start.month = date_start.month + 1
+    year_month_range.end.year = date_end.year
+    year_month_range.end.month = date_end.month + 1
+    historical_metrics_options.include_average_cpc = include_average_cpc
+
+    # Pick the seed setter of the selected mode once instead of branching on every chunk
+    set_seed = SEED_SETTERS[keyword_ideas_mode]
+    seed_batches = build_seed_batches(keyword_ideas_mode, keyword_texts)
+
+    def request_keyword_ideas(chunk, seed):
+        check_canceled(exec_context)
+        request = type(base_request)()
+        request.CopyFrom(base_request)
+        request.geo_target_constants.extend(chunk)
+        set_seed(request, seed)
+        keyword_ideas_pager = keyword_plan_idea_service.generate_keyword_ideas(
+            request=request
+        )
+        # Consume the pager inside the retried function so that errors raised while paging are retried too
+        return list(keyword_ideas_pager)
+
     for iteration_id, chunk in enumerate(location_chunks, start=1):
         # cancel the execution if the user cancels the execution
         check_canceled(exec_context)
 
-        if keyword_ideas_mode == "URL":
-
-            def request_keyword_ideas(chunk, url):
-                keyword_ideas = []
-                check_canceled(exec_context)
-                request = client.get_type("GenerateKeywordIdeasRequest")
-                request.customer_id = account_id
-                request.language = language_rn
-                request.geo_target_constants.extend(chunk)
-                request.keyword_plan_network = keyword_plan_network
-                request.include_adult_keywords = include_adult_keywords
-                historical_metrics_options = client.get_type("HistoricalMetricsOptions")
-                year_month_range = historical_metrics_options.year_month_range
-                year_month_range.start.year = date_start.year
-                year_month_range.start.month = date_start.month + 1
-                year_month_range.end.year = date_end.year
-                year_month_range.end.month = date_end.month + 1
-                request.historical_metrics_options.CopyFrom(historical_metrics_options)
-                request.historical_metrics_options.include_average_cpc = (
-                    include_average_cpc
-                )
-                request.url_seed.url = url
-                keyword_ideas_pager = keyword_plan_idea_service.generate_keyword_ideas(
-                    request=request
-                )
-                keyword_ideas.extend(list(keyword_ideas_pager))
-                return keyword_ideas
-
-            # Process each URL
-            for url in keyword_texts:
-
-                # Pass chunk information and URL to the retry function
-                keyword_ideas_pager = exponential_backoff_retry(
-                    lambda c=chunk, u=url: request_keyword_ideas(c, u),
-                    chunk_info=f"{chunk}-{url}",
-                )
-
-                keyword_ideas = list(keyword_ideas_pager)
-                all_keyword_ideas.extend(keyword_ideas)
-                iteration_ids.extend([iteration_id] * len(keyword_ideas))
-                location_ids.extend([chunk] * len(keyword_ideas))
-
-                # Update the progress bar
-                progress = iteration_id / total_chunks
-                exec_context.set_progress(
-                    progress,
-                    f"We have generated  {len(all_keyword_ideas)} keyword ideas so far. More ideas \U0001F4A1 are on the way!. This process may take some time, so please be pacient.",
-                )
+        # Process each URL or keyword chunk
+        for seed_info, seed in seed_batches:
 
-                if len(all_keyword_ideas) >= batch_size:
-                    df_batch, df_monthly_batch = process_batch(
-                        all_keyword_ideas,
-                        iteration_ids,
-                        location_ids,
-                        include_average_cpc,
-                    )
-                    if not df_batch.empty:
-                        aggregated_data.append(df_batch)
-                    if not df_monthly_batch.empty:
-                        aggregated_monthly_volumes.append(df_monthly_batch)
-                    all_keyword_ideas = []
-                    iteration_ids = []
-                    location_ids = []
-
-                # Add a delay between URLs to reduce API rate limit issues
-                time.sleep(3)  # Increase the sleep time to 15 seconds
-
-        elif keyword_ideas_mode == "KEYWORDS":
-
-            def request_keyword_ideas(chunk, chunked_keywords):
-                keyword_ideas = []
-                check_canceled(exec_context)
-                request = client.get_type("GenerateKeywordIdeasRequest")
-                request.customer_id = account_id
-                request.language = language_rn
-                request.geo_target_constants.extend(chunk)
-                request.keyword_plan_network = keyword_plan_network
-                request.include_adult_keywords = include_adult_keywords
-                historical_metrics_options = client.get_type("HistoricalMetricsOptions")
-                year_month_range = historical_metrics_options.year_month_range
-                year_month_range.start.year = date_start.year
-                year_month_range.start.month = date_start.month + 1
-                year_month_range.end.year = date_end.year
-                year_month_range.end.month = date_end.month + 1
-                request.historical_metrics_options.CopyFrom(historical_metrics_options)
-                request.historical_metrics_options.include_average_cpc = (
-                    include_average_cpc
-                )
-                request.keyword_seed.keywords.extend(chunked_keywords)
-                keyword_ideas_pager = keyword_plan_idea_service.generate_keyword_ideas(
-                    request=request
-                )
-                keyword_ideas.extend(list(keyword_ideas_pager))
-                return keyword_ideas
-
-            # Process each keyword chunk
-            for i in range(0, len(keyword_texts), 20):
-                chunked_keywords = keyword_texts[i : i + 20]
-
-                # Pass chunk information and chunked keywords to the retry function
-                keyword_ideas_pager = exponential_backoff_retry(
-                    lambda c=chunk, ck=chunked_keywords: request_keyword_ideas(c, ck),
-                    chunk_info=f"{chunk}-{i}",
-                )
-
-                keyword_ideas = list(keyword_ideas_pager)
-                all_keyword_ideas.extend(keyword_ideas)
-                iteration_ids.extend([iteration_id] * len(keyword_ideas))
-                location_ids.extend([chunk] * len(keyword_ideas))
+            # Pass chunk information and seed to the retry function
+            keyword_ideas = exponential_backoff_retry(
+                lambda c=chunk, s=seed: request_keyword_ideas(c, s),
+                chunk_info=f"{chunk}-{seed_info}",
+            )
+            all_keyword_ideas.extend(keyword_ideas)
+            iteration_ids.extend([iteration_id] * len(keyword_ideas))
+            location_ids.extend([chunk] * len(keyword_ideas))
+
+            # Update the progress bar
+            progress = iteration_id / total_chunks
+            exec_context.set_progress(
+                progress,
+                KEYWORD_IDEAS_PROGRESS_MESSAGE.format(len(all_keyword_ideas)),
+            )
 
-                # Update the progress bar
-                progress = iteration_id / total_chunks
-                exec_context.set_progress(
-                    progress,
-                    f"We have generated  {len(all_keyword_ideas)} keyword ideas so far. More ideas \U0001F4A1 are on the way!. This process may take some time, so please be pacient.",
+            if len(all_keyword_ideas) >= batch_size:
+                df_batch, df_monthly_batch = process_batch(
+                    all_keyword_ideas,
+                    iteration_ids,
+                    location_ids,
+                    include_average_cpc,
                 )
-
-                if len(all_keyword_ideas) >= batch_size:
-                    df_batch, df_monthly_batch = process_batch(
-                        all_keyword_ideas,
-                        iteration_ids,
-                        location_ids,
-                        include_average_cpc,
-                    )
-                    if not df_batch.empty:
-                        aggregated_data.append(df_batch)
-                    if not df_monthly_batch.empty:
-                        aggregated_monthly_volumes.append(df_monthly_batch)
-                    all_keyword_ideas = []
-                    iteration_ids = []
-                    location_ids = []
-
-                # Add a delay between keyword chunks to reduce API rate limit issues
-                time.sleep(3)  # Increase the sleep time to 5 seconds
+                if not df_batch.empty:
+                    aggregated_data.append(df_batch)
+                if not df_monthly_batch.empty:
+                    aggregated_monthly_volumes.append(df_monthly_batch)
+                all_keyword_ideas = []
+                iteration_ids = []
+                location_ids = []
 
     # Process any remaining keyword ideas
     if all_keyword_ideas:
@@ -430,6 +466,44 @@ def generate_keywords_ideas_with_chunks(
     return df_keyword_ideas_aggregated, df_monthly_search_volumes
 
 
+def calculate_seasonality(search_volumes_per_idea):
+    """
+    Calculates the adjusted seasonality of the monthly search volumes of each keyword idea.
+    Ideas with the same number of months are fitted together, with one least squares fit over all their columns.
+    Ideas without search volumes get None.
+    """
+    seasonality = [None] * len(search_volumes_per_idea)
+
+    # Group the ideas by number of months, in practice all ideas of a batch have the same number of months
+    ideas_by_length = {}
+    for index, monthly_search_volumes in enumerate(search_volumes_per_idea):
+        if monthly_search_volumes:
+            ideas_by_length.setdefault(len(monthly_search_volumes), []).append(index)
+
+    for length, indices in ideas_by_length.items():
+        # One column of search volumes per idea
+        y = np.array([search_volumes_per_idea[i] for i in indices], dtype=float).T
+
+        # Calculate trend lines using linear regression
+        x = np.arange(length)
+        coefficients = np.polyfit(x, y, 1)
+        trend_lines = np.outer(x, coefficients[0]) + coefficients[1]
+
+        # Calculate residuals
+        residuals = y - trend_lines
+
+        # Calculate standard deviation of residuals
+        std_dev = np.std(residuals, axis=0)
+
+        # Adjust seasonality
+        avg_search_volume = np.mean(y, axis=0)
+        adjusted_seasonality = std_dev / avg_search_volume
+        for i, value in zip(indices, adjusted_seasonality.tolist()):
+            seasonality[i] = value
+
+    return seasonality
+
+
 def process_batch(all_keyword_ideas, iteration_ids, location_ids, include_average_cpc):
 
     # Create empty lists to store data
@@ -441,11 +515,12 @@ def process_batch(all_keyword_ideas, iteration_ids, location_ids, include_averag
     high_top_of_page_bid_micros = []
     low_top_of_page_bid_micros = []
     search_volumes = []
-    seasonality = []
-
-    # create a list to store the monthly search volumes to output in a separate table
+    search_volumes_per_idea = []
 
-    monthly_search_volumes_dfs = []
+    # create one list per column to store the monthly search volumes to output in a separate table
+    monthly_search_volumes_columns = {
+        column: [] for column in MONTHLY_SEARCH_VOLUMES_COLUMNS
+    }
 
     # Extract data and populate lists
     for idea, iteration_id, location_id in zip(
@@ -455,18 +530,14 @@ def process_batch(all_keyword_ideas, iteration_ids, location_ids, include_averag
 
         keywords_ideas.append(idea.text)
         avg_monthly_searches.append(idea.keyword_idea_metrics.avg_monthly_searches)
-        competition_values.append(
-            competition_to_text(idea.keyword_idea_metrics.competition)
-        )
+        competition_values.append(idea.keyword_idea_metrics.competition)
         competition_index.append(idea.keyword_idea_metrics.competition_index)
-        average_cpc_micros.append(
-            micros_to_currency(idea.keyword_idea_metrics.average_cpc_micros)
-        )
+        average_cpc_micros.append(idea.keyword_idea_metrics.average_cpc_micros)
         high_top_of_page_bid_micros.append(
-            micros_to_currency(idea.keyword_idea_metrics.high_top_of_page_bid_micros)
+            idea.keyword_idea_metrics.high_top_of_page_bid_micros
         )
         low_top_of_page_bid_micros.append(
-            micros_to_currency(idea.keyword_idea_metrics.low_top_of_page_bid_micros)
+            idea.keyword_idea_metrics.low_top_of_page_bid_micros
         )
         monthly_search_volumes = [
             metrics.monthly_searches
@@ -475,36 +546,28 @@ def process_batch(all_keyword_ideas, iteration_ids, location_ids, include_averag
         # Calculate the total search volume of the period
         search_volumes.append(sum(monthly_search_volumes))
 
-        # Append the monthly search volumes to the list to output in a separate table
-
-        monthly_df = parse_monthly_search_volumes(
+        # Append the monthly search volumes to the columns to output in a separate table
+        parse_monthly_search_volumes(
             idea.keyword_idea_metrics.monthly_search_volumes,
             idea.text,
             iteration_id,
             location_id,
+            monthly_search_volumes_columns,
         )
-        monthly_search_volumes_dfs.append(monthly_df)
 
-        # Calculate the seasonality of the search volumes
-        if not monthly_search_volumes:
-            adjusted_seasonality = None
-        else:
-            # Calculate trend line using linear regression
-            x = np.arange(len(monthly_search_volumes))
-            y = monthly_search_volumes
-            coefficients = np.polyfit(x, y, 1)
-            trend_line = np.polyval(coefficients, x)
+        # Keep the search volumes to calculate the seasonality of all ideas at once
+        search_volumes_per_idea.append(monthly_search_volumes)
 
-            # Calculate residuals
-            residuals = y - trend_line
+    seasonality = calculate_seasonality(search_volumes_per_idea)
 
-            # Calculate standard deviation of residuals
-            std_dev = np.std(residuals)
-
-            # Adjust seasonality
-            avg_search_volume = np.mean(monthly_search_volumes)
-            adjusted_seasonality = std_dev / avg_search_volume
-        seasonality.append(adjusted_seasonality)
+    # Convert the micros to currency on the whole columns instead of value by value
+    average_cpc = micros_to_currency(np.array(average_cpc_micros, dtype=float))
+    high_top_of_page_bid = micros_to_currency(
+        np.array(high_top_of_page_bid_micros, dtype=float)
+    )
+    low_top_of_page_bid = micros_to_currency(
+        np.array(low_top_of_page_bid_micros, dtype=float)
+    )
 
     # Create a DataFrame from the lists and include the iteration ID
     data = {
@@ -514,12 +577,12 @@ def process_batch(all_keyword_ideas, iteration_ids, location_ids, include_averag
         # Approximate number of searches on this query for the past twelve months.
         "Total Searches of the Period": search_volumes,
         # Average cost per click for the query.
-        "Average Cost per Click": average_cpc_micros,
+        "Average Cost per Click": average_cpc,
         # Calculated the trend line, residuals, standard deviation of residuals, and adjusted seasonality for the provided monthly search volumes data.
         # Reference article: https://blog.startupstash.com/detect-seasonality-within-keyword-planner-data-in-google-sheets-eb9c3dabbe53
         "Searches Seasonality": seasonality,
         # The competition level for this search query.
-        "Competition": competition_values,
+        "Competition": competition_values_to_text(competition_values),
         # The competition index for the query in the range [0, 100]. This shows
         # how competitive ad placement is for a keyword. The level of
         # competition from 0-100 is determined by the number of ad slots filled
@@ -528,22 +591,24 @@ def process_batch(all_keyword_ideas, iteration_ids, location_ids, include_averag
         "Competition Index": competition_index,
         # Top of page bid high range (80th percentile) in micros for the
         # keyword.
-        "Top of Page Bid High Range (Currency) ": high_top_of_page_bid_micros,
+        "Top of Page Bid High Range (Currency) ": high_top_of_page_bid,
         # Top of page bid low range (20th percentile) in micros for the keyword.
-        "Top of Page Bid Low Range (Currency)": low_top_of_page_bid_micros,
+        "Top of Page Bid Low Range (Currency)": low_top_of_page_bid,
         "Chunk Number": iteration_ids,
         "Locations in Chunk": location_ids,
     }
 
     # Dataframe with the keyword ideas and the aggregated data for the first output table
-    df = pd.DataFrame(convert_missing_to_zero(data))
+    df = convert_missing_to_zero(
+        data, skip_columns=("Keyword Idea", "Competition", "Locations in Chunk")
+    )
 
     # Drop the average CPC column if the user does not want to include it
     if include_average_cpc == False:
         df = df.drop(columns=["Average Cost per Click"])
 
     # Dataframe with the monthly search volumes for the second output table
-    df_monthly_search_volumes = pd.concat(monthly_search_volumes_dfs, ignore_index=True)
+    df_monthly_search_volumes = pd.DataFrame(monthly_search_volumes_columns)
 
     return df, df_monthly_search_volumes
 
@@ -581,12 +646,9 @@ def extract_first_item_if_all_chunk_numbers_are_1(chunk_parameter, df):
 
 
 # Function to map location ids to resource names
-def map_locations_ids_to_resource_names(port_object, location_ids):
-    client = port_object
-
-    # build_resource_name_client: GeoTargetConstantServiceClient
-    build_resource_name_client = client.get_service("GeoTargetConstantService")
-    build_resource_name = build_resource_name_client.geo_target_constant_path
+def map_locations_ids_to_resource_names(location_ids):
+    # The path helper is a static method, so no service client (and gRPC channel) is created
+    build_resource_name = GeoTargetConstantServiceClient.geo_target_constant_path
     return [build_resource_name(location_id) for location_id in location_ids]
 
 
@@ -595,20 +657,20 @@ def datediff_in_years(date1, date2):
     return abs(date1.year - date2.year)
 
 
-# Kind of dictionary to map the competition values to text
-def competition_to_text(competition_value):
-    if competition_value == 0:
-        return "Unspecified"
-    elif competition_value == 1:
-        return "Unknown"
-    elif competition_value == 2:
-        return "Low"
-    elif competition_value == 3:
-        return "Medium"
-    elif competition_value == 4:
-        return "High"
-    else:
-        return "Unknown"
+# Text of the keyword competition levels, indexed by their value: UNSPECIFIED = 0;UNKNOWN = 1;LOW = 2;MEDIUM = 3;HIGH = 4
+COMPETITION_TEXT = np.array(
+    ["Unspecified", "Unknown", "Low", "Medium", "High"], dtype=object
+)
+UNKNOWN_COMPETITION = 1
+
+
+# Converts a whole column of competition values at once, values outside the known levels are Unknown
+def competition_values_to_text(competition_values):
+    values = np.asarray(competition_values, dtype=np.int64)
+    values = np.where(
+        (values >= 0) & (values < len(COMPETITION_TEXT)), values, UNKNOWN_COMPETITION
+    )
+    return COMPETITION_TEXT[values]
 
 
 # Convert micros to currency
@@ -617,17 +679,15 @@ def micros_to_currency(micros):
 
 
 # Function to convert missing values to 0
-def convert_missing_to_zero(data):
-    # Convert missing values to 0
-    for col in data:
-        if isinstance(data[col][0], list):  # Check if the column contains arrays
-            data[col] = [
-                [0 if pd.isnull(item) else item for item in val] for val in data[col]
-            ]
-        else:
-            data[col] = [0 if pd.isnull(val) else val for val in data[col]]
-
+def convert_missing_to_zero(data, skip_columns=()):
+    # The caller knows which columns are not metrics (texts and the locations of a chunk) and skips them,
+    # instead of probing the first value of every column
     df = pd.DataFrame(data)
+    fill_columns = [col for col in df.columns if col not in skip_columns]
+
+    # Convert missing values to 0 in one vectorized pass. Columns without any value are object columns,
+    # infer_objects turns them into int64 once they only hold zeros.
+    df[fill_columns] = df[fill_columns].fillna(0).infer_objects()
     return df
 
 
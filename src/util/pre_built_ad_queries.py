@@ -48,7 +48,8 @@ class HardCodedQueries(knext.EnumParameterOptions):
     )   
 
 def get_query(name,start_date,end_date)->str:
-    query = mapping_queries[name].replace("$$start_date$$", str(start_date)).replace("$$end_date$$", str(end_date))
+    # The queries are format templates, so both dates are filled in a single pass
+    query = mapping_queries[name].format(start_date=start_date, end_date=end_date)
     return query
 
 mapping_queries = {
@@ -64,7 +65,7 @@ mapping_queries = {
                 metrics.cost_micros,
                 campaign.bidding_strategy_type
             FROM campaign
-            WHERE segments.date BETWEEN '$$start_date$$' AND '$$end_date$$'
+            WHERE segments.date BETWEEN '{start_date}' AND '{end_date}'
             AND campaign.status != 'REMOVED' 
         """,
     "ADGROUPS":"""     SELECT ad_group.name,
@@ -77,7 +78,7 @@ mapping_queries = {
                         metrics.average_cpc,
                         metrics.cost_micros
                 FROM ad_group
-                WHERE segments.date BETWEEN '$$start_date$$' AND '$$end_date$$'
+                WHERE segments.date BETWEEN '{start_date}' AND '{end_date}'
                 AND ad_group.status != 'REMOVED'
         """,
     "ADS" : """ SELECT ad_group_ad.ad.expanded_text_ad.headline_part1,
@@ -96,7 +97,7 @@ mapping_queries = {
                 metrics.average_cpc,
                 metrics.cost_micros
             FROM ad_group_ad
-            WHERE segments.date BETWEEN '$$start_date$$' AND '$$end_date$$'
+            WHERE segments.date BETWEEN '{start_date}' AND '{end_date}'
             AND ad_group_ad.status != 'REMOVED'
         """,
     "SEARCHKEYWORDS": """SELECT ad_group_criterion.keyword.text,
@@ -112,7 +113,7 @@ mapping_queries = {
                 metrics.average_cpc,
                 metrics.cost_micros
             FROM keyword_view
-            WHERE segments.date BETWEEN '$$start_date$$' AND '$$end_date$$'
+            WHERE segments.date BETWEEN '{start_date}' AND '{end_date}'
             AND ad_group_criterion.status != 'REMOVED'
         """,
     "SEARCHTERMS" : """SELECT search_term_view.search_term,
@@ -127,7 +128,7 @@ mapping_queries = {
                     metrics.cost_micros,
                     campaign.advertising_channel_type
             FROM search_term_view
-            WHERE segments.date BETWEEN '$$start_date$$' AND '$$end_date$$'
+            WHERE segments.date BETWEEN '{start_date}' AND '{end_date}'
         """,
     "AUDIENCE" :"""SELECT ad_group_criterion.resource_name,
                 ad_group_criterion.type,
@@ -142,7 +143,7 @@ mapping_queries = {
                 metrics.cost_micros,
                 campaign.advertising_channel_type
             FROM ad_group_audience_view
-            WHERE segments.date BETWEEN '$$start_date$$' AND '$$end_date$$'
+            WHERE segments.date BETWEEN '{start_date}' AND '{end_date}'
         """,
     
     "AGE" : """SELECT ad_group_criterion.age_range.type,
@@ -157,7 +158,7 @@ mapping_queries = {
                 metrics.cost_micros,
                 campaign.advertising_channel_type
             FROM age_range_view
-            WHERE segments.date BETWEEN '$$start_date$$' AND '$$end_date$$'
+            WHERE segments.date BETWEEN '{start_date}' AND '{end_date}'
         """,
     "GENDER" : """SELECT ad_group_criterion.gender.type,
                 campaign.name,
@@ -171,7 +172,7 @@ mapping_queries = {
                 metrics.cost_micros,
                 campaign.advertising_channel_type
             FROM gender_view
-            WHERE segments.date BETWEEN '$$start_date$$' AND '$$end_date$$'                  
+            WHERE segments.date BETWEEN '{start_date}' AND '{end_date}'                  
         """,
     "LOCATION" : """SELECT campaign_criterion.location.geo_target_constant,
                 campaign.name,
@@ -182,7 +183,7 @@ mapping_queries = {
                 metrics.average_cpc,
                 metrics.cost_micros
             FROM location_view
-            WHERE segments.date BETWEEN '$$start_date$$' AND '$$end_date$$'
+            WHERE segments.date BETWEEN '{start_date}' AND '{end_date}'
             AND campaign_criterion.status != 'REMOVED'
         """
 }
\ No newline at end of file
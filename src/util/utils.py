@@ -46,23 +46,40 @@
 import knime.extension as knext
 import logging
 from typing import Callable, List
-from abc import ABC, abstractmethod
-import re
-import pandas as pd
-import pyarrow as pa
-import pyarrow.compute as pc
 
 LOGGER = logging.getLogger(__name__)
 
+# Progress message shown while the rows of a search stream response are processed
+ROWS_PROCESSED_PROGRESS_MESSAGE = (
+    "{} rows processed. We are preparing your data \U0001F468\u200D\U0001F373"
+)
+
 
 def check_canceled(exec_context: knext.ExecutionContext) -> None:
     """
-    Checks if the user has canceled the execution and if so throws a RuntimeException
+    Checks if the user has canceled the execution and if so throws a RuntimeException.
+    The check calls into KNIME, so loops over search stream results call it once per batch and not per row.
     """
     if exec_context.is_canceled():
         raise RuntimeError("Execution canceled")
 
 
+def get_attribute_paths(field_paths) -> List[List[str]]:
+    """
+    Splits the field paths of a search stream batch into the attribute names used to traverse each row.
+    The split is the same for all rows of a batch, so it only needs to be done once per batch.
+    """
+    # query-fix for ADGROUP and AD queries: we are iterating over the attribute_value (type = class) line
+    # and using the field name splitted to access the values with the getattr(method),
+    # when trying to use 'type' there is not any attr called like this
+    # in the class attribute_value, so adding and underscore fix this.
+    # temp fix: we don't know how to check before the attr name of the class attribute value
+    return [
+        [part + "_" if part == "type" else part for part in field.split(".")]
+        for field in field_paths
+    ]
+
+
 def check_column(
     input_table: knext.Schema,
     column_name: str,